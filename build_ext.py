@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+"""
+Ahead-of-time compile the note state machine with Numba.
+
+Builds the _ytmidi_kernels extension module next to this script. When it is
+present, extract_midi.py imports run_state_machine from it instead of
+JIT-compiling the kernel at startup. Requires numba and a C compiler:
+
+    python build_ext.py
+"""
+
+import os
+
+from numba.pycc import CC
+
+import extract_midi
+
+
+def main():
+    cc = CC('_ytmidi_kernels')
+    cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+    cc.export('run_state_machine', extract_midi.STATE_MACHINE_SIG)(
+        extract_midi._run_state_machine.py_func)
+    cc.compile()
+    print(f"Built _ytmidi_kernels in {cc.output_dir}")
+
+
+if __name__ == "__main__":
+    main()
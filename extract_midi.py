@@ -7,13 +7,235 @@ converts to a two-track MIDI file with accurate timing.
 """
 
 import argparse
+import os
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# Parallelism comes from the reader thread and --jobs worker processes, so keep
+# OpenMP/BLAS runtimes to one thread; must be set before cv2/numpy load them
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+
 import cv2
 import numpy as np
 from midiutil import MIDIFile
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the state machine then runs as plain Python
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+# Number of set bits in each byte value
+POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def count_bits(mask):
+    """Count nonzero entries in each row of a 2D mask.
+
+    Rows are packed eight pixels per byte and counted through the popcount
+    table, so the reduction runs over an eighth of the data.
+    """
+    return POPCOUNT[np.packbits(mask, axis=1)].sum(axis=1, dtype=np.uint16)
+
+
+# Inclusive HSV bounds of lit keys (S and V must exceed 50)
+GREEN_HSV = ((35, 51, 51), (85, 255, 255))
+BLUE_HSV = ((85, 51, 51), (135, 255, 255))
+
+
+def hsv_masks(hsv):
+    """Return (green, blue) 0/255 masks for an HSV image (Mat or UMat).
+
+    cv2.inRange tests all three channel bounds in one vectorized pass.
+    """
+    return cv2.inRange(hsv, *GREEN_HSV), cv2.inRange(hsv, *BLUE_HSV)
+
+
+def bgr_masks(bgr):
+    """Return (green, blue) masks for BGR pixels of shape (..., 3).
+
+    Approximates the HSV cutoffs without a color conversion: V is the
+    brightest channel, S > 50 is tested as (max - min) * 255 > 50 * max,
+    and the hue band is picked by the brightest channel, trimmed to the
+    HSV hue limits with the sector's linear hue formula.
+    """
+    b = bgr[..., 0].astype(np.int32)
+    g = bgr[..., 1].astype(np.int32)
+    r = bgr[..., 2].astype(np.int32)
+
+    v_max = np.maximum(np.maximum(b, g), r)
+    chroma = v_max - np.minimum(np.minimum(b, g), r)
+    lit = (v_max > 50) & (chroma * 255 > 50 * v_max)
+
+    green_sector = g == v_max
+    green = lit & green_sector & (6 * np.abs(b - r) <= 5 * chroma)
+    blue = lit & (((b == v_max) & (2 * (r - g) <= chroma)) |
+                  (green_sector & (6 * (b - r) >= 5 * chroma)))
+    return green, blue
+
+
+class NoteArrays:
+    """Extracted notes as growable parallel arrays.
+
+    The first len(notes) entries of midis, starts, durations and hands (a
+    hand code: 0 = left, 1 = right) are valid; the buffers double on overflow.
+    """
+
+    def __init__(self, capacity=4096):
+        self.midis = np.empty(capacity, dtype=np.int16)
+        self.starts = np.empty(capacity, dtype=np.float64)
+        self.durations = np.empty(capacity, dtype=np.float64)
+        self.hands = np.empty(capacity, dtype=np.int8)
+        self.n = 0
+
+    def __len__(self):
+        return self.n
+
+    def extend(self, midis, starts, durations, hands):
+        """Append a batch of notes given as equal-length arrays."""
+        end = self.n + len(midis)
+        if end > len(self.midis):
+            capacity = max(end, 2 * len(self.midis))
+            self.midis = np.resize(self.midis, capacity)
+            self.starts = np.resize(self.starts, capacity)
+            self.durations = np.resize(self.durations, capacity)
+            self.hands = np.resize(self.hands, capacity)
+
+        self.midis[self.n:end] = midis
+        self.starts[self.n:end] = starts
+        self.durations[self.n:end] = durations
+        self.hands[self.n:end] = hands
+        self.n = end
+
+
+@njit(cache=True)
+def _run_state_machine(is_lit, hand_code, frame0, stride, fps, debounce, min_dur,
+                       active, unlit_count, start_time, note_hand):
+    """Advance the per-key note on/off state machine over a block of frames.
+
+    is_lit and hand_code are (frames, keys) arrays for frames sampled every
+    `stride` video frames starting at frame0; hand codes are 0 = left,
+    1 = right, -1 = none. The state arrays (active, unlit_count, start_time,
+    note_hand) are updated in place so the next block continues where this
+    one stopped.
+
+    Returns the notes released in this block as (keys, starts, durations,
+    hands) arrays.
+    """
+    n_frames, n_keys = is_lit.shape
+
+    # A key releases at most once per lit/unlit pair, plus one carried-over note
+    max_notes = n_keys * (n_frames // 2 + 1)
+    keys = np.empty(max_notes, dtype=np.int32)
+    starts = np.empty(max_notes, dtype=np.float64)
+    durations = np.empty(max_notes, dtype=np.float64)
+    hands = np.empty(max_notes, dtype=np.int8)
+    n = 0
+
+    for f in range(n_frames):
+        time_sec = (frame0 + f * stride) / fps
+
+        for k in range(n_keys):
+            if is_lit[f, k]:
+                unlit_count[k] = 0
+
+                if not active[k]:
+                    active[k] = True
+                    start_time[k] = time_sec
+                    note_hand[k] = hand_code[f, k]
+            else:
+                unlit_count[k] += 1
+
+                if active[k] and unlit_count[k] >= debounce:
+                    end_time = time_sec - (debounce - 1) * stride / fps
+                    dur = end_time - start_time[k]
+
+                    if dur >= min_dur:
+                        keys[n] = k
+                        starts[n] = start_time[k]
+                        durations[n] = dur
+                        hands[n] = note_hand[k]
+                        n += 1
+
+                    active[k] = False
+
+    return keys[:n], starts[:n], durations[:n], hands[:n]
+
+
+# Numba signature of the ahead-of-time compiled state machine (see build_ext.py)
+STATE_MACHINE_SIG = ('Tuple((i4[:], f8[:], f8[:], i1[:]))'
+                     '(b1[:, :], i1[:, :], i8, i8, f8, i8, f8, b1[:], i4[:], f8[:], i1[:])')
+
+try:  # compiled by build_ext.py; avoids the JIT compile on every cold start
+    from _ytmidi_kernels import run_state_machine
+except ImportError:
+    run_state_machine = _run_state_machine
+
+
+class NoteTracker:
+    """Debounced note state machine, fed detections a block of frames at a time.
+
+    Per-key state carries across feed() calls, so detections can be passed in
+    as they are produced instead of being held for the whole video.
+    """
+
+    def __init__(self, extractor, start_frame, min_duration):
+        self.ex = extractor
+        self.next_frame = start_frame
+        self.min_duration = min_duration
+
+        n_keys = len(extractor.midis)
+        self.active = np.zeros(n_keys, dtype=np.bool_)
+        self.unlit_count = np.full(n_keys, 999, dtype=np.int32)
+        self.start_time = np.zeros(n_keys, dtype=np.float64)
+        self.note_hand = np.full(n_keys, -1, dtype=np.int8)
+
+        self.notes = NoteArrays()
+
+    def feed(self, is_lit, hand_code, start_frame=None):
+        """Advance over the (frames, keys) detections of the next sampled frames.
+
+        start_frame is the video frame of the first row; by default the rows
+        continue directly after the previous feed().
+        """
+        ex = self.ex
+        if start_frame is not None:
+            self.next_frame = start_frame
+
+        # Fed in blocks to bound the kernel's per-call note buffers
+        for b0 in range(0, len(is_lit), ex.block_frames):
+            b1 = b0 + ex.block_frames
+            keys, starts, durations, hands = run_state_machine(
+                is_lit[b0:b1], hand_code[b0:b1], self.next_frame + b0 * ex.stride,
+                ex.stride, ex.fps, ex.release_debounce_frames, self.min_duration,
+                self.active, self.unlit_count, self.start_time, self.note_hand)
+            self.notes.extend(ex.midis[keys], starts, durations, hands)
+
+        self.next_frame += len(is_lit) * ex.stride
+
+    def finish(self):
+        """Close the notes still held at the end of the video and return all notes."""
+        final_time = self.ex.total_frames / self.ex.fps
+        keys = np.flatnonzero(self.active)
+        durations = final_time - self.start_time[keys]
+        keep = durations >= self.min_duration
+        self.notes.extend(self.ex.midis[keys[keep]], self.start_time[keys[keep]],
+                          durations[keep], self.note_hand[keys[keep]])
+
+        return self.notes
+
 
 class SynthesiaExtractor:
-    def __init__(self, video_path, key_y=500, c_positions=None):
+    def __init__(self, video_path, key_y=500, c_positions=None, bgr=False, stride=1,
+                 opencl=False):
+        if stride < 1:
+            raise ValueError(f"stride must be a positive integer, got {stride}")
+
         self.video_path = video_path
         self.cap = cv2.VideoCapture(video_path)
 
@@ -26,6 +248,19 @@ class SynthesiaExtractor:
 
         self.key_sample_y = key_y
 
+        # Threshold key colors directly in BGR instead of converting to HSV
+        self.bgr = bgr
+
+        # Run the per-frame HSV conversion on the GPU via OpenCV's OpenCL (T-API) path
+        self.opencl = opencl and cv2.ocl.haveOpenCL()
+        if opencl and not self.opencl:
+            print("OpenCL not available, converting colors on the CPU")
+
+        # Only every `stride`-th frame is decoded and examined; timing resolution
+        # (and the debounce window) scale with it
+        self.stride = stride
+        self.fps_eff = self.fps / stride
+
         # Sample region size (pixels)
         self.sample_width = 7
         self.sample_height = 7
@@ -33,9 +268,21 @@ class SynthesiaExtractor:
         # What fraction of pixels in the region must be lit to count as "key pressed"
         self.lit_threshold = 0.3
 
+        # Smallest lit pixel count whose ratio meets lit_threshold, so detection
+        # compares integer counts instead of dividing per key per frame
+        n_pixels = self.sample_width * self.sample_height
+        self._lit_count_thresh = next(
+            (c for c in range(n_pixels + 1) if c / n_pixels >= self.lit_threshold), n_pixels + 1)
+
         # Debounce: consecutive unlit frames before releasing
         self.release_debounce_frames = 2
 
+        # Progress report interval (frames), hoisted out of the per-frame loop
+        self._progress_every = max(1, int(self.fps * 20))
+
+        # Frames of detections buffered per state machine call
+        self.block_frames = 256
+
         # C note positions (LEFT EDGE of key) - calibrated for 1276x720 video
         self.c_left_edge = c_positions or {
             24: 51, 36: 224, 48: 396, 60: 567, 72: 742, 84: 914, 96: 1086,
@@ -47,82 +294,91 @@ class SynthesiaExtractor:
         self.octave_width = np.mean(octave_widths)
         self.white_key_width = self.octave_width / 7
 
-        self.note_positions = {}
         self._build_note_positions()
+        self._build_sample_indices()
 
     def _build_note_positions(self):
-        """Build x-positions for all 88 piano keys based on C note calibration."""
-        for c_midi, c_left in self.c_left_edge.items():
-            white_positions = [0, 2, 4, 5, 7, 9, 11]
-            for i, semitone in enumerate(white_positions):
-                midi = c_midi + semitone
-                x = c_left + (i + 0.5) * self.white_key_width
-                self.note_positions[midi] = {'x': int(x), 'is_black': False}
-
-            black_info = [(1, 0, 1), (3, 1, 2), (6, 3, 4), (8, 4, 5), (10, 5, 6)]
-            for semitone, left_white, right_white in black_info:
-                midi = c_midi + semitone
-                x = c_left + (left_white + 1) * self.white_key_width
-                self.note_positions[midi] = {'x': int(x), 'is_black': True}
-
-        c7_left = self.c_left_edge[96]
-        for i, semitone in enumerate([0, 2, 4, 5, 7, 9, 11]):
-            midi = 96 + semitone
-            if midi <= 108:
-                x = c7_left + (i + 0.5) * self.white_key_width
-                self.note_positions[midi] = {'x': int(x), 'is_black': False}
-
-        print(f"Mapped {len(self.note_positions)} keys")
-
-    def is_key_lit(self, frame, midi):
-        """Check if a key is lit by sampling a region of pixels."""
-        if midi not in self.note_positions:
-            return False, None
-
-        info = self.note_positions[midi]
-        cx = info['x']
-
-        # Position adjustments for accurate detection
-        if info['is_black']:
-            cy = self.key_sample_y + 15
-        else:
-            cx = cx - 3
-            cy = self.key_sample_y
-
-        half_w = self.sample_width // 2
-        half_h = self.sample_height // 2
-
-        x1 = max(0, cx - half_w)
-        x2 = min(self.width, cx + half_w + 1)
-        y1 = max(0, cy - half_h)
-        y2 = min(self.height, cy + half_h + 1)
-
-        if x2 <= x1 or y2 <= y1:
-            return False, None
-
-        region = frame[y1:y2, x1:x2]
-        hsv_region = cv2.cvtColor(region, cv2.COLOR_BGR2HSV)
-
-        h = hsv_region[:, :, 0]
-        s = hsv_region[:, :, 1]
-        v = hsv_region[:, :, 2]
-
-        green_mask = (h >= 35) & (h <= 85) & (s > 50) & (v > 50)
-        blue_mask = (h >= 85) & (h <= 135) & (s > 50) & (v > 50)
-
-        total_pixels = region.shape[0] * region.shape[1]
-        green_ratio = np.sum(green_mask) / total_pixels
-        blue_ratio = np.sum(blue_mask) / total_pixels
+        """Build x-positions for all piano keys based on C note calibration.
+
+        Every calibrated octave is laid out in one broadcast, producing
+        per-key arrays sorted by MIDI number (midis, note_x, note_is_black)
+        plus the sample centers note_cx/note_cy after the black/white key
+        offsets. Key index i refers to midis[i] throughout detection.
+        """
+        c_midis = np.array(sorted(self.c_left_edge))
+        c_lefts = np.array([self.c_left_edge[c] for c in c_midis], dtype=np.float64)
+
+        # Semitones of the 7 white then 5 black keys, and their offsets from C's
+        # left edge: white keys at their centers, black keys on the boundary
+        # after white key 0, 1, 3, 4, 5
+        semitones = np.array([0, 2, 4, 5, 7, 9, 11, 1, 3, 6, 8, 10])
+        offsets = np.concatenate([np.arange(7) + 0.5, np.array([0, 1, 3, 4, 5]) + 1])
+
+        midis = (c_midis[:, None] + semitones).ravel()
+        xs = (c_lefts[:, None] + offsets * self.white_key_width).ravel().astype(np.int32)
+        is_black = np.tile(np.arange(12) >= 7, len(c_midis))
+
+        order = np.argsort(midis, kind='stable')
+        order = order[midis[order] <= 108]
+
+        self.midis = midis[order].astype(np.int8)
+        self.note_x = xs[order]
+        self.note_is_black = is_black[order]
+
+        self.note_cx = np.where(self.note_is_black, self.note_x, self.note_x - 3).astype(np.int32)
+        self.note_cy = np.where(self.note_is_black, self.key_sample_y + 15,
+                                self.key_sample_y).astype(np.int32)
+
+        # Dict view used by the debug image
+        self.note_positions = {
+            midi: {'x': x, 'is_black': black}
+            for midi, x, black in zip(self.midis.tolist(), self.note_x.tolist(),
+                                      self.note_is_black.tolist())
+        }
 
-        if green_ratio >= self.lit_threshold:
-            return True, 'left'
-        if blue_ratio >= self.lit_threshold:
-            return True, 'right'
+        print(f"Mapped {len(self.midis)} keys")
 
-        return False, None
+    def _build_sample_indices(self):
+        """Precompute the pixel coordinates of every key's sample region.
 
-    def extract(self, output_path, skip_seconds=5.0, min_duration=0.03, debug=False):
-        """Extract notes from video and save as MIDI file."""
+        Produces two (keys, sample_height * sample_width) int32 arrays,
+        clipped to the frame, so a whole frame can be sampled with a single
+        fancy-index instead of one slice per key. The video geometry is fixed,
+        so these are computed once rather than per frame.
+        """
+        half_w = self.sample_width // 2
+        half_h = self.sample_height // 2
+        n_keys = len(self.midis)
+
+        dy, dx = np.meshgrid(np.arange(-half_h, half_h + 1), np.arange(-half_w, half_w + 1),
+                             indexing='ij')
+        gy = self.note_cy[:, None, None] + dy
+        gx = self.note_cx[:, None, None] + dx
+        self._gy = np.clip(gy, 0, self.height - 1).reshape(n_keys, -1).astype(np.int32)
+        self._gx = np.clip(gx, 0, self.width - 1).reshape(n_keys, -1).astype(np.int32)
+
+        # Detection only needs the band of rows covered by the sample regions;
+        # frames are cropped to it so per-frame work touches W * strip * 3 bytes
+        # instead of W * H * 3.
+        self._strip_y0 = int(self._gy.min())
+        self._strip_y1 = int(self._gy.max()) + 1
+        self._gy_strip = self._gy - self._strip_y0
+
+        # Flat (row * width + col) offsets into the strip, for 1D takes on masks
+        self._gidx_strip = self._gy_strip * self.width + self._gx
+
+    def __getstate__(self):
+        # VideoCapture can't be pickled; worker processes open their own
+        state = self.__dict__.copy()
+        del state['cap']
+        return state
+
+    def extract(self, output_path, skip_seconds=5.0, min_duration=0.03, debug=False, jobs=1):
+        """Extract notes from video and save as MIDI file.
+
+        With jobs > 1, detection is split across that many processes, each
+        decoding its own contiguous range of frames.
+        """
         if debug:
             self.cap.set(cv2.CAP_PROP_POS_FRAMES, int(14 * self.fps))
             ret, debug_frame = self.cap.read()
@@ -130,83 +386,183 @@ class SynthesiaExtractor:
                 self._save_debug(debug_frame, "debug_calibration.jpg")
 
         start_frame = int(skip_seconds * self.fps)
-        self.cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
-
-        note_state = {}
-        all_notes = []
-        frame_num = start_frame
 
         print(f"Processing from {skip_seconds}s...")
 
-        while True:
-            ret, frame = self.cap.read()
-            if not ret:
-                break
+        # Sampled frame numbers, split into one contiguous range per job
+        sampled = np.arange(start_frame, self.total_frames, self.stride)
+        ranges = [r for r in np.array_split(sampled, max(1, jobs)) if len(r)]
+
+        tracker = NoteTracker(self, start_frame, min_duration)
+
+        if len(ranges) > 1:
+            # One state machine runs over the chunks in order, so notes that
+            # span a chunk boundary are tracked exactly as in a single pass
+            bounds = [int(r[0]) for r in ranges] + [None]
+            with ProcessPoolExecutor(max_workers=len(ranges), initializer=cv2.setNumThreads,
+                                     initargs=(1,)) as pool:
+                chunks = pool.map(_detect_chunk, repeat(self), bounds[:-1], bounds[1:])
+                # Each chunk is timed from its own start frame, so a chunk that
+                # came up short doesn't shift the ones after it
+                for chunk_start, (is_lit, hand_code) in zip(bounds, chunks):
+                    tracker.feed(is_lit, hand_code, chunk_start)
+        else:
+            self._detect_range(self.cap, start_frame, on_block=tracker.feed)
 
-            time_sec = frame_num / self.fps
+        self.cap.release()
 
-            if frame_num % int(self.fps * 20) == 0:
-                print(f"  {time_sec:.0f}s / {self.total_frames/self.fps:.0f}s")
+        notes = tracker.finish()
 
-            for midi in self.note_positions:
-                is_lit, hand = self.is_key_lit(frame, midi)
+        print(f"\nExtracted {len(notes)} notes")
+        self._save_midi(notes, output_path)
 
-                if midi not in note_state:
-                    note_state[midi] = {
-                        'active': False,
-                        'start_time': None,
-                        'hand': None,
-                        'unlit_count': 999
-                    }
+        return notes
 
-                state = note_state[midi]
+    def _detect_range(self, cap, start_frame, end_frame=None, on_block=None):
+        """Detect lit keys on every sampled frame in [start_frame, end_frame).
 
-                if is_lit:
-                    state['unlit_count'] = 0
+        Returns (is_lit, hand_code) arrays of shape (frames, keys); hand codes
+        are 0 = left, 1 = right, -1 = none. end_frame=None reads to the end.
+        With on_block, detections are instead passed to on_block(is_lit,
+        hand_code) every block_frames frames and nothing is returned.
+        """
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
 
-                    if not state['active']:
-                        state['active'] = True
-                        state['start_time'] = time_sec
-                        state['hand'] = hand
-                else:
-                    state['unlit_count'] += 1
-
-                    if state['active'] and state['unlit_count'] >= self.release_debounce_frames:
-                        end_time = time_sec - (self.release_debounce_frames - 1) / self.fps
-                        dur = end_time - state['start_time']
-
-                        if dur >= min_duration:
-                            all_notes.append({
-                                'midi': midi,
-                                'start': state['start_time'],
-                                'duration': dur,
-                                'hand': state['hand']
-                            })
-
-                        state['active'] = False
-                        state['start_time'] = None
-
-            frame_num += 1
-
-        # Close remaining notes
-        final_time = self.total_frames / self.fps
-        for midi, state in note_state.items():
-            if state['active'] and state['start_time'] is not None:
-                dur = final_time - state['start_time']
-                if dur >= min_duration:
-                    all_notes.append({
-                        'midi': midi,
-                        'start': state['start_time'],
-                        'duration': dur,
-                        'hand': state['hand']
-                    })
+        # Decode on a reader thread (cap.read releases the GIL) so it overlaps detection
+        frames = queue.Queue(maxsize=max(1, int(self.fps_eff)))
+        stop_reading = threading.Event()
+        reader = threading.Thread(target=self._read_frames,
+                                  args=(cap, start_frame, end_frame, frames, stop_reading), daemon=True)
+        reader.start()
 
-        self.cap.release()
-
-        print(f"\nExtracted {len(all_notes)} notes")
-        self._save_midi(all_notes, output_path)
-
-        return all_notes
+        # Preallocated (frames, keys) rows; a single block when streaming
+        n_keys = len(self.midis)
+        if on_block is None:
+            stop = self.total_frames if end_frame is None else end_frame
+            n_rows = max(1, len(range(start_frame, stop, self.stride)))
+        else:
+            n_rows = self.block_frames
+        is_lit = np.zeros((n_rows, n_keys), dtype=np.bool_)
+        hand_code = np.empty((n_rows, n_keys), dtype=np.int8)
+        n = 0
+
+        last_sig = None
+        read_error = None
+
+        try:
+            while True:
+                item = frames.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    read_error = item
+                    continue
+                frame_num, strip = item
+
+                if frame_num % self._progress_every < self.stride:
+                    print(f"  {frame_num / self.fps:.0f}s / {self.total_frames / self.fps:.0f}s")
+
+                if self.bgr:
+                    lit_row, hand_row = self._detect_all(strip)
+                else:
+                    green_full, blue_full = self._strip_masks(strip)
+
+                    # Most frames repeat the previous key state. Identical masks mean
+                    # identical keys, so skip the gather: the nonzero counts screen
+                    # cheaply and an exact compare rules out count collisions.
+                    sig = (cv2.countNonZero(green_full), cv2.countNonZero(blue_full))
+                    if not (sig == last_sig and np.array_equal(green_full, last_green)
+                            and np.array_equal(blue_full, last_blue)):
+                        lit_row, hand_row = self._detect_all(strip, (green_full, blue_full))
+                        last_sig, last_green, last_blue = sig, green_full, blue_full
+
+                if n == len(is_lit):
+                    if on_block is not None:
+                        on_block(is_lit, hand_code)
+                        n = 0
+                    else:
+                        # The container's frame count came up short; grow the buffers
+                        is_lit = np.resize(is_lit, (2 * n, n_keys))
+                        hand_code = np.resize(hand_code, (2 * n, n_keys))
+
+                is_lit[n] = lit_row
+                hand_code[n] = hand_row
+                n += 1
+        finally:
+            # Stop the reader even when detection fails or is interrupted, and
+            # wait for it: exiting while it is inside cap.grab() aborts the process
+            stop_reading.set()
+            while reader.is_alive():
+                try:
+                    frames.get(timeout=0.1)  # unblock a put() on a full queue
+                except queue.Empty:
+                    pass
+            reader.join()
+
+        if read_error is not None:
+            raise read_error
+
+        if on_block is not None:
+            if n:
+                on_block(is_lit[:n], hand_code[:n])
+            return None
+
+        return is_lit[:n], hand_code[:n]
+
+    def _strip_masks(self, strip):
+        """Return the HSV (green, blue) masks of a whole key strip."""
+        if self.opencl:
+            hsv = cv2.cvtColor(cv2.UMat(strip), cv2.COLOR_BGR2HSV)
+            return tuple(m.get() for m in hsv_masks(hsv))
+
+        return hsv_masks(cv2.cvtColor(strip, cv2.COLOR_BGR2HSV))
+
+    def _detect_all(self, strip, masks=None):
+        """Detect every key on a key strip (frame rows _strip_y0:_strip_y1).
+
+        Returns per-key (is_lit, hand_code) arrays. In HSV mode, `masks` may
+        pass in the strip's already computed _strip_masks.
+        """
+        if self.bgr:
+            # Sample every key region in one gather, then threshold
+            green_mask, blue_mask = bgr_masks(strip[self._gy_strip, self._gx])
+        else:
+            # Threshold the whole strip, then gather each key's mask pixels
+            green_full, blue_full = masks if masks is not None else self._strip_masks(strip)
+            green_mask = green_full.ravel().take(self._gidx_strip)
+            blue_mask = blue_full.ravel().take(self._gidx_strip)
+
+        green_lit = count_bits(green_mask) >= self._lit_count_thresh
+        blue_lit = count_bits(blue_mask) >= self._lit_count_thresh
+        hand_code = np.where(green_lit, 0, np.where(blue_lit, 1, -1)).astype(np.int8)
+        return green_lit | blue_lit, hand_code
+
+    def _read_frames(self, cap, start_frame, end_frame, frames, stop_reading):
+        """Read frames into a queue as (frame_num, key strip), ending with None.
+
+        Only the rows covered by the sample regions are kept; the strip is
+        copied so queued items don't pin whole decoded frames in memory. A
+        read error is queued ahead of the None for the consumer to re-raise.
+        Reading ends early once the `stop_reading` event is set.
+        """
+        try:
+            frame_num = start_frame
+            while (not stop_reading.is_set() and (end_frame is None or frame_num < end_frame)
+                   and cap.grab()):
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                frames.put((frame_num, frame[self._strip_y0:self._strip_y1].copy()))
+                frame_num += self.stride
+
+                # grab() advances without the color conversion/copy that retrieve() does
+                for _ in range(self.stride - 1):
+                    if not cap.grab():
+                        break
+        except Exception as exc:
+            frames.put(exc)
+        finally:
+            frames.put(None)
 
     def _save_midi(self, notes, path, tempo=120):
         """Save extracted notes to a MIDI file with two tracks (left/right hand)."""
@@ -217,11 +573,11 @@ class SynthesiaExtractor:
 
         sec_per_beat = 60.0 / tempo
 
-        for note in notes:
-            track = 0 if note['hand'] == 'left' else 1
-            midi.addNote(track, 0, note['midi'],
-                        note['start'] / sec_per_beat,
-                        note['duration'] / sec_per_beat, 100)
+        n = len(notes)
+        for pitch, start, dur, hand in zip(notes.midis[:n].tolist(), notes.starts[:n].tolist(),
+                                           notes.durations[:n].tolist(), notes.hands[:n].tolist()):
+            track = 0 if hand == 0 else 1
+            midi.addNote(track, 0, pitch, start / sec_per_beat, dur / sec_per_beat, 100)
 
         with open(path, 'wb') as f:
             midi.writeFile(f)
@@ -234,7 +590,10 @@ class SynthesiaExtractor:
         cv2.line(vis, (0, self.key_sample_y), (self.width, self.key_sample_y), (0, 255, 255), 1)
         cv2.line(vis, (0, self.key_sample_y + 15), (self.width, self.key_sample_y + 15), (255, 255, 0), 1)
 
-        for midi, info in self.note_positions.items():
+        is_lit, hand_code = self._detect_all(frame[self._strip_y0:self._strip_y1])
+
+        for key, midi in enumerate(self.midis.tolist()):
+            info = self.note_positions[midi]
             if info['is_black']:
                 x = info['x']
                 y = self.key_sample_y + 15
@@ -245,10 +604,8 @@ class SynthesiaExtractor:
             half_w = self.sample_width // 2
             half_h = self.sample_height // 2
 
-            is_lit, hand = self.is_key_lit(frame, midi)
-
-            if is_lit:
-                color = (0, 255, 0) if hand == 'left' else (255, 0, 0)
+            if is_lit[key]:
+                color = (0, 255, 0) if hand_code[key] == 0 else (255, 0, 0)
                 cv2.rectangle(vis, (x - half_w, y - half_h), (x + half_w, y + half_h), color, 2)
             else:
                 cv2.rectangle(vis, (x - half_w, y - half_h), (x + half_w, y + half_h), (128, 128, 128), 1)
@@ -261,27 +618,46 @@ class SynthesiaExtractor:
         print(f"Debug image: {path}")
 
 
+def _detect_chunk(extractor, start_frame, end_frame):
+    """Process pool entry point: detect one frame range with a private capture."""
+    cap = cv2.VideoCapture(extractor.video_path)
+    try:
+        return extractor._detect_range(cap, start_frame, end_frame)
+    finally:
+        cap.release()
+
+
 def analyze(notes):
     """Print analysis of extracted notes."""
     if not notes:
         return
 
-    left = [n for n in notes if n['hand'] == 'left']
-    right = [n for n in notes if n['hand'] == 'right']
-    pitches = [n['midi'] for n in notes]
-    durations = [n['duration'] for n in notes]
+    n = len(notes)
+    pitches = notes.midis[:n]
+    starts = notes.starts[:n]
+    durations = notes.durations[:n]
+    hands = notes.hands[:n]
 
     print(f"\nAnalysis:")
-    print(f"  Total: {len(notes)}, Left: {len(left)}, Right: {len(right)}")
-    print(f"  MIDI range: {min(pitches)} - {max(pitches)}")
-    print(f"  Duration range: {min(durations):.3f}s - {max(durations):.3f}s")
+    print(f"  Total: {n}, Left: {np.count_nonzero(hands == 0)}, Right: {np.count_nonzero(hands == 1)}")
+    print(f"  MIDI range: {pitches.min()} - {pitches.max()}")
+    print(f"  Duration range: {durations.min():.3f}s - {durations.max():.3f}s")
     print(f"  Avg duration: {np.mean(durations):.3f}s")
 
     print(f"\nFirst 25 notes:")
-    for n in sorted(notes, key=lambda x: x['start'])[:25]:
-        h = "L" if n['hand'] == 'left' else "R"
-        name = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'][n['midi'] % 12]
-        print(f"  {n['start']:.3f}s: {h} {name}{n['midi']//12-1} (MIDI {n['midi']}) dur={n['duration']:.3f}s")
+    for i in np.argsort(starts, kind='stable')[:25].tolist():
+        midi = int(pitches[i])
+        h = "L" if hands[i] == 0 else "R"
+        name = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B'][midi % 12]
+        print(f"  {starts[i]:.3f}s: {h} {name}{midi//12-1} (MIDI {midi}) dur={durations[i]:.3f}s")
+
+
+def positive_int(value):
+    """argparse type for options that must be an integer >= 1."""
+    n = int(value)
+    if n < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value}")
+    return n
 
 
 def main():
@@ -295,6 +671,14 @@ def main():
                        help="Seconds to skip at start (default: 5.0)")
     parser.add_argument("-y", "--key-y", type=int, default=500,
                        help="Y coordinate for key detection (default: 500)")
+    parser.add_argument("--bgr", action="store_true",
+                       help="Threshold key colors in BGR instead of HSV (faster, approximate)")
+    parser.add_argument("--opencl", action="store_true",
+                       help="Convert colors on the GPU via OpenCL when available")
+    parser.add_argument("--stride", type=positive_int, default=1,
+                       help="Examine every Nth frame; lowers timing resolution (default: 1)")
+    parser.add_argument("-j", "--jobs", type=positive_int, default=1,
+                       help="Worker processes to split the video across (default: 1)")
     parser.add_argument("--debug", action="store_true",
                        help="Save debug calibration image")
     parser.add_argument("--analyze", action="store_true",
@@ -302,8 +686,15 @@ def main():
 
     args = parser.parse_args()
 
-    extractor = SynthesiaExtractor(args.video, key_y=args.key_y)
-    notes = extractor.extract(args.output, skip_seconds=args.skip, debug=args.debug)
+    # Keep OpenCV's internal thread pool out of the way: it would oversubscribe
+    # the cores alongside the reader thread and --jobs workers (which call
+    # cv2.setNumThreads(1) themselves when they start)
+    cv2.setNumThreads(1)
+
+    extractor = SynthesiaExtractor(args.video, key_y=args.key_y, bgr=args.bgr,
+                                   stride=args.stride, opencl=args.opencl)
+    notes = extractor.extract(args.output, skip_seconds=args.skip, debug=args.debug,
+                              jobs=args.jobs)
 
     if args.analyze and notes:
         analyze(notes)